@@ -1,5 +1,9 @@
+import traceback
+from contextlib import contextmanager
+from itertools import chain
 from Malt.PipelineParameters import Parameter, Type
-import bpy    
+from Malt.SourceTranspiler import GLSLTranspiler, PythonTranspiler
+import bpy, blf
 from BlenderMalt.MaltProperties import MaltPropertyGroup
 
 COLUMN_TYPES = ['Texture','sampler','Material']
@@ -41,22 +45,25 @@ class MaltNode():
         return result
 
     # Blender will trigger update callbacks even before init and update has finished
-    # So we use some wrappers to get a more sane behaviour
-    def _disable_updates_wrapper(self, function):
+    # So we disable updates while they run to get a more sane behaviour
+    @contextmanager
+    def disable_updates_ctx(self):
         tree = self.id_data
         initial_tree_updates = tree.disable_updates
+        initial_updates = self.disable_updates
         tree.disable_updates = True
         self.disable_updates = True
         try:
-            function()
+            yield
         except:
-            import traceback
             traceback.print_exc()
-        tree.disable_updates = initial_tree_updates
-        self.disable_updates = False
+        finally:
+            tree.disable_updates = initial_tree_updates
+            self.disable_updates = initial_updates
 
     def init(self, context):
-        self._disable_updates_wrapper(self.malt_init)
+        with self.disable_updates_ctx():
+            self.malt_init()
         
     def setup(self, context=None):
         self.setup_implementation()
@@ -66,7 +73,8 @@ class MaltNode():
         if self.internal_name == '':
             label = self.malt_label if self.malt_label != '' else self.name
             self.internal_name = self.id_data.get_unique_node_id(label)
-        self._disable_updates_wrapper(lambda: self.malt_setup(copy=copy))
+        with self.disable_updates_ctx():
+            self.malt_setup(copy=copy)
         self.first_setup = False
         if self.subscribed == False:
             def callback(dummy=None):
@@ -77,7 +85,8 @@ class MaltNode():
     def update(self):
         if self.disable_updates:
             return
-        self._disable_updates_wrapper(self.malt_update)
+        with self.disable_updates_ctx():
+            self.malt_update()
     
     def copy(self, node):
         #Find the node from its node tree so we have access to the node id_data
@@ -129,10 +138,9 @@ class MaltNode():
             inputs = _expand_structs(inputs)
             outputs = _expand_structs(outputs)
         def setup(current, new):
-            remove = []
-            for e in current.keys():
-                if e not in new:
-                    remove.append(current[e])
+            current_keys = current.keys()
+            remove = [current[e] for e in current_keys if e not in new]
+            current_keys = set(current_keys)
             for e in remove:
                 if e.is_linked == False or self.should_delete_outdated_links():
                     current.remove(e)
@@ -144,32 +152,43 @@ class MaltNode():
                     continue #Skip overrides
                 type = dic['type']
                 size = dic['size'] if 'size' in dic else 0
-                is_new_socket = name not in current
+                is_new_socket = name not in current_keys
+                # Look up each socket once and only write the properties that changed,
+                # every access goes through the RNA collection
                 if is_new_socket:
-                    current.new('MaltSocket', name)
-                    current[name].show_in_material_panel = show_in_material_panel
-                if isinstance(type, Parameter):
-                    current[name].data_type = type.type_string()
-                    current[name].array_size = 0 #TODO
+                    socket = current.new('MaltSocket', name)
+                    socket.show_in_material_panel = show_in_material_panel
                 else:
-                    current[name].data_type = type
-                    current[name].array_size = size
-                current[name].active = True
-                current[name].default_initialization = ''
-                try:
-                    current[name].ui_label = dic['meta']['label']
-                except:
-                    current[name].ui_label = name
+                    socket = current[name]
+                if isinstance(type, Parameter):
+                    type = type.type_string()
+                    size = 0 #TODO
+                if socket.data_type != type:
+                    socket.data_type = type
+                if socket.array_size != size:
+                    socket.array_size = size
+                if socket.active == False:
+                    socket.active = True
+                default_initialization = ''
                 try:
                     default = dic['meta']['default']
                     if isinstance(default, str):
-                        current[name].default_initialization = default
+                        default_initialization = default
                 except:
                     pass
+                if socket.default_initialization != default_initialization:
+                    socket.default_initialization = default_initialization
+                try:
+                    ui_label = dic['meta']['label']
+                except:
+                    ui_label = name
+                if socket.ui_label != ui_label:
+                    socket.ui_label = ui_label
                 if is_new_socket:
-                    current[name].setup_shape()
-                if current.find(name) != socket_index:
-                    current.move(current.find(name), socket_index)
+                    socket.setup_shape()
+                index = current.find(name)
+                if index != socket_index:
+                    current.move(index, socket_index)
                 socket_index += 1
 
         setup(self.inputs, inputs)
@@ -252,7 +271,6 @@ class MaltNode():
         return False
     
     def calc_node_width(self, point_size, dpi) -> float:
-        import blf 
         blf.size(0, point_size, dpi)
         header_padding = 36 # account for a little space for the arrow icon + extra padding on the side of a label
         socket_padding = 31 # account for little offset of the text from the node border
@@ -281,31 +299,31 @@ class MaltNode():
         return self.id_data.get_transpiler().get_source_name(self.internal_name)
 
     def get_source_code(self, transpiler):
-        if self.id_data.get_source_language() == 'GLSL':
+        if transpiler is GLSLTranspiler:
             return '/*{} not implemented*/'.format(self)
-        elif self.id_data.get_source_language() == 'Python':
+        elif transpiler is PythonTranspiler:
             return '# {} not implemented'.format(self)
 
     def get_source_socket_reference(self, socket):
-        if self.id_data.get_source_language() == 'GLSL':
+        language = self.id_data.get_source_language()
+        if language == 'GLSL':
             return '/*{} not implemented*/'.format(socket.name)
-        elif self.id_data.get_source_language() == 'Python':
+        elif language == 'Python':
             return '# {} not implemented'.format(socket.name)
     
     def sockets_to_global_parameters(self, sockets, transpiler):
-        code = ''
+        code = []
         for socket in sockets:
             if socket.active == False:
                 continue
             if socket.data_type != '' and socket.get_linked() is None and socket.is_struct_member() == False:
-                code += transpiler.global_declaration(socket.data_type, socket.array_size, socket.get_source_global_reference())
-        return code
+                code.append(transpiler.global_declaration(socket.data_type, socket.array_size, socket.get_source_global_reference()))
+        return ''.join(code)
     
     def get_source_global_parameters(self, transpiler):
         return self.sockets_to_global_parameters(self.inputs, transpiler)
     
     def setup_socket_shapes(self):
-        from itertools import chain
         for socket in chain(self.inputs.values(), self.outputs.values()):
             socket.setup_shape()
     
@@ -1,11 +1,16 @@
-import os, time
+import os, time, hashlib, tempfile, traceback
+from types import MappingProxyType
+from collections import OrderedDict
+from contextlib import contextmanager
 from Malt.SourceTranspiler import GLSLTranspiler, PythonTranspiler
 import bpy
+from nodeitems_utils import NodeCategory, NodeItem, register_node_categories, unregister_node_categories
 from BlenderMalt.MaltProperties import MaltPropertyGroup
-from BlenderMalt import MaltPipeline
+from BlenderMalt import MaltPipeline, MaltMaterial
 from BlenderMalt.MaltUtils import malt_path_setter, malt_path_getter
 
 from BlenderMalt.MaltNodes.MaltNode import MaltNode
+from BlenderMalt.MaltNodes.Nodes.MaltInlineNode import get_last_setup_keys
 
 def get_pipeline_graph(context):
     if context is None or context.space_data is None or context.space_data.edit_tree is None:
@@ -73,6 +78,9 @@ class MaltTree(bpy.types.NodeTree):
     
     links_hash : bpy.props.StringProperty(options={'SKIP_SAVE','LIBRARY_EDITABLE'},
         override={'LIBRARY_OVERRIDABLE'})
+    
+    source_hash : bpy.props.StringProperty(options={'SKIP_SAVE','LIBRARY_EDITABLE'},
+        override={'LIBRARY_OVERRIDABLE'})
 
     def is_active(self):
         return self.get_pipeline_graph() is not None
@@ -81,44 +89,56 @@ class MaltTree(bpy.types.NodeTree):
         return self.get_pipeline_graph().language
 
     def get_transpiler(self):
-        if self.get_source_language() == 'GLSL':
+        language = self.get_source_language()
+        if language == 'GLSL':
             return GLSLTranspiler
-        elif self.get_source_language() == 'Python':
+        elif language == 'Python':
             return PythonTranspiler
 
     def get_library_path(self):
         if self.library_source != '':
-            src_path = bpy.path.abspath(self.library_source, library=self.library)
-            if os.path.exists(src_path):
-                return src_path
+            # Resolved paths are cached until the next track_library_changes poll,
+            # since a single update can query them once per node
+            library_paths = get_library_paths()
+            key = (self.library_source, bpy.data.filepath, self.library.as_pointer() if self.library else 0)
+            if key not in library_paths:
+                src_path = bpy.path.abspath(self.library_source, library=self.library)
+                library_paths[key] = src_path if os.path.exists(src_path) else None
+            return library_paths[key]
         return None
     
     #deprecated
     def get_library(self):
         library_path = self.get_library_path()
         if library_path:
+            # None while the library is waiting for reflection (KeyError if it wasn't polled yet),
+            # so nodes are never set up against an empty stand-in
             return get_libraries()[library_path]
         else:
             return get_empty_library()
     
     def get_full_library(self):
-        #TODO: Cache
         graph = self.get_pipeline_graph()
         library = self.get_library()
-        if library:
-            result = get_empty_library()
-            result['functions'].update(graph.functions)
-            result['structs'].update(graph.structs)
-            result['subcategories'].update(graph.subcategories)
-            result['functions'].update(library['functions'])
-            result['structs'].update(library['structs'])
-            return result
-        else:
+        if len(library['functions']) == 0 and len(library['structs']) == 0:
+            # Common case, no need to merge anything
             return {
                 'functions' : graph.functions,
                 'structs' : graph.structs,
                 'subcategories' : graph.subcategories,
             }
+        # The merged dicts are rebuilt only when the graph or the library is reloaded
+        full_libraries = get_full_libraries()
+        key = (graph.name, self.get_library_path())
+        cached = full_libraries.get(key)
+        if cached is None or cached[0] is not graph or cached[1] is not library:
+            result = {
+                'functions' : {**graph.functions, **library['functions']},
+                'structs' : {**graph.structs, **library['structs']},
+                'subcategories' : graph.subcategories,
+            }
+            cached = full_libraries[key] = (graph, library, result)
+        return cached[2]
     
     def get_pipeline_graph(self, graph_type=None):
         if graph_type is None: 
@@ -168,14 +188,17 @@ class MaltTree(bpy.types.NodeTree):
         return None
     
     def get_generated_source_dir(self):
-        import os, tempfile
-        base_path = tempfile.gettempdir()
-        if bpy.context.blend_data.is_saved:
-            base_path = bpy.path.abspath('//')
-        return os.path.join(base_path,'.malt-autogenerated')
-
-    def get_generated_source_path(self):
-        import os
+        # The directory only depends on the .blend file path, so it's resolved once per file
+        blend_path = bpy.context.blend_data.filepath
+        source_dirs = get_source_dirs()
+        if blend_path not in source_dirs:
+            base_path = tempfile.gettempdir()
+            if bpy.context.blend_data.is_saved:
+                base_path = bpy.path.abspath('//')
+            source_dirs[blend_path] = os.path.join(base_path,'.malt-autogenerated')
+        return source_dirs[blend_path]
+
+    def get_generated_source_path(self, file_extension=None):
         file_prefix = 'temp'
         if self.library:
             file_prefix = bpy.path.basename(self.library.filepath).split('.')[0]
@@ -183,15 +206,21 @@ class MaltTree(bpy.types.NodeTree):
             file_prefix = bpy.path.basename(bpy.context.blend_data.filepath).split('.')[0]
         pipeline_graph = self.get_pipeline_graph()
         if pipeline_graph:
-            return os.path.join(self.get_generated_source_dir(),'{}-{}{}'.format(file_prefix, self.name, pipeline_graph.file_extension))
+            if file_extension is None:
+                file_extension = pipeline_graph.file_extension
+            return os.path.join(self.get_generated_source_dir(),'{}-{}{}'.format(file_prefix, self.name, file_extension))
         return None
     
+    def get_generated_source_cache_path(self):
+        return self.get_generated_source_path('.cache')
+    
     def get_generated_source(self, force_update=False):
         if force_update == False and self.get('source'):
             return self['source']
 
         output_nodes = []
         linked_nodes = []
+        linked_nodes_set = set()
         
         pipeline_graph = self.get_pipeline_graph()
         if pipeline_graph:
@@ -200,62 +229,180 @@ class MaltTree(bpy.types.NodeTree):
                 if node.bl_idname == 'MaltIONode' and node.is_output:
                     output_nodes.append(node)
                     linked_nodes.append(node)
+                    linked_nodes_set.add(node.as_pointer())
+        
+        # Resolve the links of each node once, they're shared by every output traversal and by the node digests.
+        # Python wrappers for bpy structs are re-created on each access, so nodes are keyed by their pointer.
+        linked_inputs = {}
+        def get_linked_inputs(node):
+            key = node.as_pointer()
+            if key not in linked_inputs:
+                result = []
+                for input in node.inputs:
+                    linked = input.get_linked()
+                    if linked:
+                        result.append((input, linked, linked.node))
+                linked_inputs[key] = result
+            return linked_inputs[key]
         
-        def add_node_inputs(node, list, io_type):
-            for input in node.inputs:
-                if input.get_linked():
-                    new_node = input.get_linked().node
+        # Iterative post-order traversal, so every node comes after the nodes it depends on.
+        def get_node_inputs(output, io_type):
+            result = []
+            visited = set()
+            stack = [(output, False)]
+            while len(stack) > 0:
+                node, processed = stack.pop()
+                if processed:
+                    result.append(node)
+                    if node.as_pointer() not in linked_nodes_set:
+                        linked_nodes_set.add(node.as_pointer())
+                        linked_nodes.append(node)
+                    continue
+                if node.as_pointer() in visited:
+                    continue
+                visited.add(node.as_pointer())
+                if node is not output:
+                    stack.append((node, True))
+                input_nodes = []
+                node_inputs = get_linked_inputs(node)
+                unmuted_inputs = []
+                for input, linked, new_node in node_inputs:
                     if new_node.bl_idname == 'MaltIONode' and new_node.io_type != io_type:
                         input.links[0].is_muted = True
                         continue
-                    if new_node not in list:
-                        add_node_inputs(new_node, list, io_type)
-                        list.append(new_node)
-                    if new_node not in linked_nodes:
-                        linked_nodes.append(new_node)
+                    unmuted_inputs.append((input, linked, new_node))
+                    input_nodes.append(new_node)
+                # Muted links are no longer linked for the following traversals
+                node_inputs[:] = unmuted_inputs
+                stack.extend((new_node, False) for new_node in reversed(input_nodes))
+            return result
         
         transpiler = self.get_transpiler()
+        # Node source code is cached and keyed by the node state plus the digests of its upstream nodes,
+        # so only the edited nodes and the nodes downstream from them are transpiled again.
+        node_sources = get_node_sources()
+        tree_key = repr((transpiler.__name__, id(pipeline_graph), id(self.get_library()))).encode()
+        node_digests = {}
+        def get_node_source_code(node):
+            h = hashlib.blake2b(tree_key, digest_size=16)
+            h.update(get_node_source_key(node).encode())
+            for input, linked, linked_node in get_linked_inputs(node):
+                h.update(repr((input.identifier, linked.identifier)).encode())
+                h.update(node_digests.get(linked_node.as_pointer(), b''))
+            digest = h.digest()
+            node_digests[node.as_pointer()] = digest
+            if node.bl_idname == 'MaltIONode':
+                #IO nodes also depend on the graph and custom pass IO
+                return node.get_source_code(transpiler)
+            cached = node_sources.get(node.as_pointer())
+            if cached and cached[0] == digest:
+                return cached[1]
+            code = node.get_source_code(transpiler)
+            node_sources[node.as_pointer()] = (digest, code)
+            return code
+
         def get_source(output):
-            nodes = []
-            add_node_inputs(output, nodes, output.io_type)
-            code = ''
+            nodes = get_node_inputs(output, output.io_type)
+            code = []
             for node in nodes:
                 if hasattr(node, 'get_source_code'):
-                    code += node.get_source_code(transpiler) + '\n'
-            code += output.get_source_code(transpiler)
-            return code
+                    code.append(get_node_source_code(node) + '\n')
+            code.append(output.get_source_code(transpiler))
+            return ''.join(code)
 
         shader ={}
         for output in output_nodes:
             shader[output.io_type] = get_source(output)
-        shader['GLOBAL'] = ''
+        global_code = []
         library_path = self.get_library_path()
         if library_path:
-            shader['GLOBAL'] += '#include "{}"\n'.format(library_path)
+            global_code.append('#include "{}"\n'.format(library_path))
         for node in linked_nodes:
             if hasattr(node, 'get_source_global_parameters'):
-                shader['GLOBAL'] += node.get_source_global_parameters(transpiler)
+                global_code.append(node.get_source_global_parameters(transpiler))
+        shader['GLOBAL'] = ''.join(global_code)
         self['source'] = pipeline_graph.generate_source(shader)
         return self['source']
     
-    def reload_nodes(self):
+    def get_source_hash(self):
+        # Hash everything the generated source depends on, so unchanged graphs can skip the transpilation
+        h = hashlib.blake2b(digest_size=16)
+        h.update(repr((self.get_generated_source_path(), self.get_library_path())).encode())
+        pipeline_graph = self.get_pipeline_graph()
+        if pipeline_graph:
+            h.update(pipeline_graph.generate_source({'GLOBAL': ''}).encode())
+            for graph_io in pipeline_graph.graph_io.values():
+                h.update(repr((graph_io.name, getattr(graph_io, 'signature', None))).encode())
+        for node in self.nodes:
+            h.update(get_node_source_key(node).encode())
+        for link in self.links:
+            h.update(repr((link.from_node.name, link.from_socket.identifier,
+                link.to_node.name, link.to_socket.identifier, link.is_muted)).encode())
+        return h.hexdigest()
+    
+    def is_source_cached(self, source_hash):
+        # The cache file stores the hash of the last generated source, so it survives reopening the .blend file
+        source_path = self.get_generated_source_path()
+        if source_path is None or os.path.exists(source_path) == False:
+            return False
+        if source_hash == self.source_hash:
+            return True
+        try:
+            with open(self.get_generated_source_cache_path(), 'r') as f:
+                if f.read() == source_hash:
+                    self.source_hash = source_hash
+                    return True
+        except OSError:
+            pass
+        return False
+    
+    def clear_source_cache(self):
+        self.source_hash = ''
+        node_sources = get_node_sources()
+        # The inline node setup keys reference the graph and library by id, which can be reused after a reload
+        setup_keys = get_last_setup_keys()
+        for node in self.nodes:
+            node_sources.pop(node.as_pointer(), None)
+            setup_keys.pop(node.as_pointer(), None)
+        cache_path = self.get_generated_source_cache_path()
+        if cache_path and os.path.exists(cache_path):
+            os.remove(cache_path)
+    
+    @contextmanager
+    def disable_updates_ctx(self):
+        initial_disable_updates = self.disable_updates
         self.disable_updates = True
         try:
-            for node in self.nodes:
-                if hasattr(node, 'setup'):
-                    node.setup()
-            for node in self.nodes:
-                if hasattr(node, 'update'):
-                    node.update()
-        except:
-            import traceback
-            traceback.print_exc()
-        self.disable_updates = False
+            yield
+        finally:
+            self.disable_updates = initial_disable_updates
+    
+    def reload_nodes(self):
+        # Returns True if reloading the nodes changed anything that affects the generated source
+        source_hash = self.get_source_hash()
+        with self.disable_updates_ctx():
+            try:
+                for node in self.nodes:
+                    if hasattr(node, 'setup'):
+                        node.setup()
+                for node in self.nodes:
+                    if hasattr(node, 'update'):
+                        node.update()
+            except:
+                traceback.print_exc()
+        return self.get_source_hash() != source_hash
 
     def update(self):
         if self.is_active():
             self.update_ext()
     
+    def subscribe_name_changes(self):
+        # The generated source path depends on the tree name
+        if self.subscribed == False:
+            bpy.msgbus.subscribe_rna(key=self.path_resolve('name', False),
+                owner=self, args=(None,), notify=lambda _ : self.update_ext(force_update=True))
+            self.subscribed = True
+    
     def update_ext(self, force_track_shader_changes=True, force_update=False):
         if self.disable_updates:
             return
@@ -263,98 +410,164 @@ class MaltTree(bpy.types.NodeTree):
         if self.get_pipeline_graph() is None:
             return
         
-        if self.subscribed == False:
-            bpy.msgbus.subscribe_rna(key=self.path_resolve('name', False),
-                owner=self, args=(None,), notify=lambda _ : self.update_ext(force_update=True))
-            self.subscribed = True
+        self.subscribe_name_changes()
         
-        links_str = ''
+        # Resolve the linked sockets once, they're needed both for the hash and for validation
+        linked_sockets = []
         for link in self.links:
             try:
                 b = link.to_socket
-                a = b.get_linked(ignore_muted=False)
-                links_str += str(a) + str(b)
+                linked_sockets.append((link, b.get_linked(ignore_muted=False), b))
             except:
                 pass #Reroute Node
-        links_hash = str(hash(links_str))
+        links_hash = str(hash(''.join(str(a) + str(b) for link, a, b in linked_sockets)))
         if force_update == False and links_hash == self.links_hash:
             return
         self.links_hash = links_hash
 
-        self.disable_updates = True
-        try:
-            for link in self.links:
-                try:
-                    b = link.to_socket
-                    a = b.get_linked(ignore_muted=False)
-                    if (a.array_size != b.array_size or 
-                        (a.data_type != b.data_type and
-                        self.cast(a.data_type, b.data_type) is None)):
-                        link.is_muted = True
-                    else:
-                        link.is_muted = False
-                except:
-                    pass
-            
-            source = self.get_generated_source(force_update=True)
-            source_dir = self.get_generated_source_dir()
-            source_path = self.get_generated_source_path()
-            import pathlib
-            pathlib.Path(source_dir).mkdir(parents=True, exist_ok=True)
-            with open(source_path,'w') as f:
-                f.write(source)
-            if force_track_shader_changes:
-                from BlenderMalt import MaltMaterial
-                MaltMaterial.track_shader_changes()
-        except:
-            import traceback
-            traceback.print_exc()
-        self.disable_updates = False
+        with self.disable_updates_ctx():
+            try:
+                for link, a, b in linked_sockets:
+                    try:
+                        a_type, b_type = a.data_type, b.data_type
+                        is_muted = (a.array_size != b.array_size or
+                            (a_type != b_type and self.cast(a_type, b_type) is None))
+                        if link.is_muted != is_muted:
+                            link.is_muted = is_muted
+                    except:
+                        pass
+                
+                if self.is_source_cached(self.get_source_hash()) == False:
+                    self.write_generated_source(force_track_shader_changes, force_update)
+            except:
+                traceback.print_exc()
         
         # Force a depsgraph update. 
         # Otherwise these will be outddated in scene_eval
         self.update_tag()
+    
+    def write_generated_source(self, force_track_shader_changes, force_update):
+        source_path = self.get_generated_source_path()
+        # Library code can change without changing the generated source,
+        # so the file must be rewritten (and its mtime updated) when regeneration was forced
+        is_forced = force_update or self.source_hash == ''
+        
+        source = self.get_generated_source(force_update=True)
+        source_changed = True
+        if is_forced == False:
+            try:
+                with open(source_path, 'r') as f:
+                    source_changed = f.read() != source
+            except OSError:
+                pass
+        if source_changed:
+            # Write to a temporary file first, so shader tracking never sees a partially written file
+            tmp_path = source_path + '.tmp'
+            try:
+                f = open(tmp_path,'w')
+            except FileNotFoundError:
+                # Only create the directory when it's missing, instead of on every update
+                os.makedirs(self.get_generated_source_dir(), exist_ok=True)
+                f = open(tmp_path,'w')
+            with f:
+                f.write(source)
+            os.replace(tmp_path, source_path)
+        # Some links may have been muted by get_generated_source
+        self.source_hash = self.get_source_hash()
+        with open(self.get_generated_source_cache_path(),'w') as f:
+            f.write(self.source_hash)
+        if source_changed and force_track_shader_changes:
+            MaltMaterial.track_shader_changes()
 
 
 def setup_node_trees():
-    graphs = MaltPipeline.get_bridge().graphs
-
-    for name, graph in graphs.items():
-        preload_menus(graph.structs, graph.functions, graph)
-    
+    # The graphs may have been reloaded
+    get_last_setup_keys().clear()
+    # Node menus are loaded on demand by node_header_ui
     track_library_changes(force_update=True, is_initial_setup=True)
     
     for tree in bpy.data.node_groups:
         if tree.bl_idname == 'MaltTree' and tree.is_active():
-            tree.reload_nodes()
-            tree.update_ext(force_track_shader_changes=False, force_update=True)
-    from BlenderMalt import MaltMaterial
-    MaltMaterial.track_shader_changes()
+            if tree.reload_nodes() or tree.is_source_cached(tree.get_source_hash()) == False:
+                tree.update_ext(force_track_shader_changes=False, force_update=True)
+            else:
+                # The source is up to date, but subscriptions don't persist across file loads
+                tree.subscribe_name_changes()
+                tree.update_tag()
+    # The caller (MaltPipeline.setup_all_ids) calls MaltMaterial.track_shader_changes right after
 
 #SKIP_SAVE doesn't work
 def manual_skip_save():
+    get_node_sources().clear()
+    get_last_setup_keys().clear()
     for tree in bpy.data.node_groups:
         if tree.bl_idname == 'MaltTree':
             tree.subscribed = False
             tree.links_hash = ''
+            tree.source_hash = ''
             for node in tree.nodes:
                 if hasattr(node, 'subscribed'):
                     node.subscribed = False
 
+def get_node_source_key(node):
+    # The node state that its generated source code depends on
+    key = [node.name, node.bl_idname]
+    for attribute in ('internal_name', 'function_type', 'struct_type', 'io_type', 'is_output', 'code'):
+        key.append(getattr(node, attribute, None))
+    for socket in node.inputs:
+        key.append((socket.name, getattr(socket, 'data_type', None), getattr(socket, 'array_size', None),
+            getattr(socket, 'active', None), getattr(socket, 'default_initialization', None),
+            socket.is_linked))
+    for socket in node.outputs:
+        key.append((socket.name, getattr(socket, 'data_type', None), getattr(socket, 'array_size', None),
+            getattr(socket, 'active', None), socket.is_linked))
+    return repr(key)
+
+# Generated source code per node pointer, as (digest, code)
+__NODE_SOURCES = {}
+def get_node_sources():
+    return __NODE_SOURCES
+
+# Generated source directory per .blend file path
+__SOURCE_DIRS = {}
+def get_source_dirs():
+    return __SOURCE_DIRS
+
 __LIBRARIES = {}    
 def get_libraries():
     return __LIBRARIES
+# Graph and library functions/structs merged, as (graph, library, full library) keyed by (graph name, library path)
+__FULL_LIBRARIES = {}
+def get_full_libraries():
+    return __FULL_LIBRARIES
+# Shared (and read-only) so trees without a library keep a stable library identity
+__EMPTY_LIBRARY = MappingProxyType({
+    'structs':MappingProxyType({}),
+    'functions':MappingProxyType({}),
+    'subcategories':MappingProxyType({}),
+    'paths':(),
+})
 def get_empty_library():
-    return {
-        'structs':{},
-        'functions':{},
-        'subcategories':{},
-        'paths':[],
-    }
-__TIMESTAMP = time.time()
+    return __EMPTY_LIBRARY
+# Resolved library paths, keyed by (library_source, blend filepath, linked library pointer)
+__LIBRARY_PATHS = {}
+def get_library_paths():
+    return __LIBRARY_PATHS
+__TIMESTAMP_NS = time.time_ns()
+# Number of consecutive track_library_changes calls that didn't find any change
+__IDLE_POLLS = 0
+
+def get_mtime_ns(path):
+    # A single stat call, instead of os.path.exists followed by os.stat
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
 
 def track_library_changes(force_update=False, is_initial_setup=False):
-    from BlenderMalt import MaltPipeline
+    # Re-resolve library paths once per poll, so files created or removed are picked up
+    __LIBRARY_PATHS.clear()
+
     if MaltPipeline.is_malt_active() == False and force_update == False:
         return 1
     
@@ -369,11 +582,13 @@ def track_library_changes(force_update=False, is_initial_setup=False):
             bridge.reload_graphs(updated_graphs)
             for graph_name in updated_graphs:
                 graph = graphs[graph_name]
-                preload_menus(graph.structs, graph.functions, graphs[graph_name])
+                if get_menu_category_id(graph) in __MENU_SOURCES:
+                    preload_menus(graph.structs, graph.functions, graph)
 
     global __LIBRARIES
-    global __TIMESTAMP
-    start_time = time.time()
+    global __TIMESTAMP_NS
+    global __IDLE_POLLS
+    start_time = time.time_ns()
 
     #purge unused libraries
     new_dic = {}
@@ -386,21 +601,23 @@ def track_library_changes(force_update=False, is_initial_setup=False):
                 else:
                     new_dic[src_path] = None
     __LIBRARIES = new_dic
+    for key in [key for key in __FULL_LIBRARIES if key[1] not in __LIBRARIES]:
+        del __FULL_LIBRARIES[key]
 
     needs_update = set()
+    # Only scenes using (deprecated) local libraries have something to check here
     for path, library in __LIBRARIES.items():
         root_dir = os.path.dirname(path)
-        if os.path.exists(path):
+        if get_mtime_ns(path) is not None:
             if library is None:
                 needs_update.add(path)
             else:
                 for sub_path in library['paths']:
-                    sub_path = os.path.join(root_dir, sub_path)
-                    if os.path.exists(sub_path):
-                        # Don't track individual files granularly since macros can completely change them
-                        if os.stat(sub_path).st_mtime > __TIMESTAMP:
-                            needs_update.add(path)
-                            break
+                    mtime_ns = get_mtime_ns(os.path.join(root_dir, sub_path))
+                    # Don't track individual files granularly since macros can completely change them
+                    if mtime_ns is not None and mtime_ns > __TIMESTAMP_NS:
+                        needs_update.add(path)
+                        break
     
     if len(needs_update) > 0:
         results = MaltPipeline.get_bridge().reflect_source_libraries(needs_update)
@@ -413,13 +630,20 @@ def track_library_changes(force_update=False, is_initial_setup=False):
             if tree.bl_idname == 'MaltTree' and tree.is_active():
                 src_path = tree.get_library_path()
                 if tree.graph_type in updated_graphs or (src_path and src_path in needs_update):
+                    # The library code may have changed even if the generated source didn't
+                    tree.clear_source_cache()
                     tree.reload_nodes()
                     tree.update_ext(force_track_shader_changes=False, force_update=True)
-        from BlenderMalt import MaltMaterial
         MaltMaterial.track_shader_changes()
     
-    __TIMESTAMP = start_time
-    return 0.1
+    __TIMESTAMP_NS = start_time
+
+    if max(len(needs_update), len(updated_graphs)) > 0:
+        __IDLE_POLLS = 0
+    else:
+        __IDLE_POLLS += 1
+    # Poll less often after ~10 seconds without changes
+    return 0.1 if __IDLE_POLLS < 100 else 1.0
 
 
 class NODE_PT_MaltNodeTree(bpy.types.Panel):
@@ -438,48 +662,95 @@ class NODE_PT_MaltNodeTree(bpy.types.Panel):
         #layout.prop(context.space_data.node_tree, 'generated_source')
 
 
-def preload_menus(structs, functions, graph=None):
-    if graph is None:
-        return
+# Uses copied code from the <nodeitems_utils> module. Manual check for updates required.
+class MaltNodeItem(NodeItem):
 
-    from nodeitems_utils import NodeCategory, NodeItem, register_node_categories, unregister_node_categories
-    from collections import OrderedDict
+    def __init__(self, nodetype, category, *, label=None, settings=None, poll=None, draw=None, item_params=None):
+        if settings is None:
+            settings = {}
 
-    # Uses copied code from the <nodeitems_utils> module. Manual check for updates required.
-    class MaltNodeItem(NodeItem):
+        self.nodetype = nodetype
+        self._label = f'{category} - {label}'
+        self.button_label = label
+        self.settings = settings
+        self.poll = poll
+        self.item_params = item_params
 
-        def __init__(self, nodetype, category, *, label=None, settings=None, poll=None, draw=None, item_params=None):
-            if settings is None:
-                settings = {}
+        def draw_default(self, layout, _context):
+            props = layout.operator("node.add_node", text=self.button_label, text_ctxt=self.translation_context)
+            props.type = self.nodetype
+            props.use_transform = True
 
-            self.nodetype = nodetype
-            self._label = f'{category} - {label}'
-            self.button_label = label
-            self.settings = settings
-            self.poll = poll
-            self.item_params = item_params
-            
-            def draw_default(self, layout, _context):
-                props = layout.operator("node.add_node", text=self.button_label, text_ctxt=self.translation_context)
-                props.type = self.nodetype
-                props.use_transform = True
+            if self.settings:
+                add_setting = props.settings.add
+                for name, value in self.settings.items():
+                    ops = add_setting()
+                    ops.name = name
+                    ops.value = value
 
-                for setting in self.settings.items():
-                    ops = props.settings.add()
-                    ops.name = setting[0]
-                    ops.value = setting[1]
+        self.draw = staticmethod(draw) if draw else staticmethod(draw_default)
 
-            self.draw = staticmethod(draw) if draw else staticmethod(draw_default)
-    
-    class MaltSearchMenuItem(MaltNodeItem):
+class MaltSearchMenuItem(MaltNodeItem):
 
-        def __init__(self, nodetype, category, *, label=None, settings=None, poll=None):
-            def draw_nothing(self, layout, _context):
-                return
-            super().__init__(nodetype, category, label=label, settings=settings, poll=poll, draw=draw_nothing)
+    def __init__(self, nodetype, category, *, label=None, settings=None, poll=None):
+        def draw_nothing(self, layout, _context):
+            return
+        super().__init__(nodetype, category, label=label, settings=settings, poll=poll, draw=draw_nothing)
+
+# Path separators become ' - ' and underscores become spaces
+_FILE_CATEGORY_TABLE = str.maketrans({'\\': ' - ', '/': ' - ', '_': ' '})
+
+# The graph, structs and functions each node category was last built from, keyed by category id
+__MENU_SOURCES = {}
+# The NodeCategory types of each graph, they're created once and reused when the graph is reloaded
+__CATEGORY_TYPES = {}
+
+def get_menu_category_id(graph):
+    return f'BLENDERMALT_{graph.name.upper()}'
 
+__PENDING_MENUS = {}
 
-    category_id = f'BLENDERMALT_{graph.name.upper()}'
+def request_menus(graph):
+    # Menus are only built for the graphs that are actually edited.
+    # Registering classes while drawing isn't safe, so they're built from a timer instead.
+    category_id = get_menu_category_id(graph)
+    menu_sources = __MENU_SOURCES.get(category_id)
+    if menu_sources and menu_sources[0] is graph:
+        return
+    if category_id in __PENDING_MENUS:
+        return
+    def load_menus():
+        if __PENDING_MENUS.pop(category_id, None) is not None:
+            preload_menus(graph.structs, graph.functions, graph)
+    __PENDING_MENUS[category_id] = load_menus
+    bpy.app.timers.register(load_menus, first_interval=0)
+
+def unregister_menus():
+    # Otherwise the node categories (and their menu classes) stay registered after the addon is disabled
+    for load_menus in __PENDING_MENUS.values():
+        if bpy.app.timers.is_registered(load_menus):
+            bpy.app.timers.unregister(load_menus)
+    __PENDING_MENUS.clear()
+    for category_id in __MENU_SOURCES.keys():
+        try:
+            unregister_node_categories(category_id)
+        except:
+            pass #Already unregistered
+    __MENU_SOURCES.clear()
+    __CATEGORY_TYPES.clear()
+
+def preload_menus(structs, functions, graph=None):
+    if graph is None:
+        return
+
+    category_id = get_menu_category_id(graph)
+
+    # Reloaded graphs are new objects, so the categories only need to be rebuilt when the identities change
+    menu_sources = (graph, structs, functions)
+    last_menu_sources = __MENU_SOURCES.get(category_id)
+    if last_menu_sources and all(a is b for a, b in zip(last_menu_sources, menu_sources)):
+        return
+    __MENU_SOURCES[category_id] = menu_sources
 
     try:
         unregister_node_categories(category_id) # you could also check the hidden <nodeitems_utils._node_categories>
@@ -522,6 +793,15 @@ def preload_menus(structs, functions, graph=None):
         }))
 
     subcategories = set()
+
+    # Many functions share the same file, so each file category is only computed once
+    file_categories = {}
+    def get_file_category(file):
+        category = file_categories.get(file)
+        if category is None:
+            category = file.translate(_FILE_CATEGORY_TABLE).replace('.glsl', '')
+            file_categories[file] = category
+        return category
     
     def add_to_category(dic, node_type):
         for k,v in dic.items():
@@ -530,7 +810,7 @@ def preload_menus(structs, functions, graph=None):
             else:
                 category = v['meta'].get('category')
             if category is None:
-                category = v['file'].replace('\\', '/').replace('/', ' - ').replace('.glsl', '').replace('_',' ')
+                category = get_file_category(v['file'])
             if category not in categories:
                 categories[category] = []
 
@@ -576,32 +856,36 @@ def preload_menus(structs, functions, graph=None):
     add_to_category(functions, 'MaltFunctionNode')
     add_to_category(structs, 'MaltStructNode')
 
-    def poll(cls, context):
-        tree = context.space_data.edit_tree
-        return tree and tree.bl_idname == 'MaltTree' and tree.graph_type == graph.name
-
-    def poll_internal(cls, context):
-        preferences = bpy.context.preferences.addons['BlenderMalt'].preferences
-        return poll(cls, context) and preferences.show_internal_nodes
-
-    category_type = type(category_id, (NodeCategory,), 
-    {
-        'poll': classmethod(poll),
-    })
-    category_internal_type = type(f'{category_id}_INTERNAL', (category_type,),
-    {
-        'poll': classmethod(poll_internal),
-    })
+    if category_id not in __CATEGORY_TYPES:
+        graph_name = graph.name
+
+        def poll(cls, context):
+            tree = context.space_data.edit_tree
+            return tree and tree.bl_idname == 'MaltTree' and tree.graph_type == graph_name
+
+        def poll_internal(cls, context):
+            preferences = bpy.context.preferences.addons['BlenderMalt'].preferences
+            return poll(cls, context) and preferences.show_internal_nodes
+
+        category_type = type(category_id, (NodeCategory,), 
+        {
+            'poll': classmethod(poll),
+        })
+        category_internal_type = type(f'{category_id}_INTERNAL', (category_type,),
+        {
+            'poll': classmethod(poll_internal),
+        })
+        __CATEGORY_TYPES[category_id] = (category_type, category_internal_type)
+    category_type, category_internal_type = __CATEGORY_TYPES[category_id]
 
     from BlenderMalt import _PLUGINS
     for plugin in _PLUGINS:
         try:
             for category, nodeitems in plugin.blendermalt_register_nodeitems(MaltNodeItem).items():
-                if category not in categories.keys():
+                if category not in categories:
                     categories[category] = []
                 categories[category].extend(nodeitems)
         except:
-            import traceback
             traceback.print_exc()
             
     category_list = []
@@ -624,10 +908,14 @@ def node_header_ui(self, context):
     node_tree = context.space_data.edit_tree
     if context.space_data.tree_type != 'MaltTree' or node_tree is None:
         return
+    graph = node_tree.get_pipeline_graph()
+    if graph:
+        request_menus(graph)
     def duplicate():
         context.space_data.node_tree = node_tree.get_copy()
     self.layout.operator('wm.malt_callback', text='', icon='DUPLICATE').callback.set(duplicate, 'Duplicate')
     def recompile():
+        node_tree.clear_source_cache()
         node_tree.update_ext(force_update=True)
     self.layout.operator("wm.malt_callback", text='', icon='FILE_REFRESH').callback.set(recompile, 'Recompile')
     self.layout.prop_search(node_tree, 'graph_type', context.scene.world.malt, 'graph_types',text='')
@@ -676,7 +964,6 @@ def active_material_update(dummy=None):
 @bpy.app.handlers.persistent
 def depsgraph_update(scene, depsgraph):
     # Show the active material node tree in the Node Editor
-    from BlenderMalt import MaltPipeline
     if MaltPipeline.is_malt_active() == False:
         return
     scene_updated = False
@@ -723,4 +1010,6 @@ def unregister():
     
     bpy.types.NODE_HT_header.remove(node_header_ui)
 
+    unregister_menus()
+
     for _class in reversed(classes): bpy.utils.unregister_class(_class)
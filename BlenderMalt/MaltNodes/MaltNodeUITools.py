@@ -402,10 +402,12 @@ class NODE_OT_malt_add_search(NodeAddOperator, Operator):
 
         if item:
             # apply settings from the node item
-            for setting in item.settings.items():
-                ops = self.settings.add()
-                ops.name = setting[0]
-                ops.value = setting[1]
+            if item.settings:
+                add_setting = self.settings.add
+                for name, value in item.settings.items():
+                    ops = add_setting()
+                    ops.name = name
+                    ops.value = value
 
             self.create_node(context, item.nodetype)
 
@@ -1,4 +1,6 @@
+import zlib
 import bpy
+from Malt.PipelineParameters import Parameter
 
 __TYPE_COLORS = {
     'bool': (0.8, 0.65, 0.84, 1.0),
@@ -20,12 +22,13 @@ __TYPE_COLORS = {
     'Scene': (1.0, 1.0, 1.0, 1.0),
 }
 def get_type_color(type):
-    if type not in __TYPE_COLORS:
-        import random, hashlib
-        seed = hashlib.sha1(type.encode('ascii')).digest()
-        rand = random.Random(seed)
-        __TYPE_COLORS[type] = (rand.random(),rand.random(),rand.random(),1.0)
-    return __TYPE_COLORS[type]
+    color = __TYPE_COLORS.get(type)
+    if color is None:
+        # Derive a stable color from the type name
+        h = zlib.crc32(type.encode('utf-8'))
+        color = ((h & 0xFF) / 255, ((h >> 8) & 0xFF) / 255, ((h >> 16) & 0xFF) / 255, 1.0)
+        __TYPE_COLORS[type] = color
+    return color
         
 
 class MaltSocket(bpy.types.NodeSocket):
@@ -63,8 +66,9 @@ class MaltSocket(bpy.types.NodeSocket):
 
     def get_source_reference(self, target_type=None):
         assert(self.active)
-        if not self.is_instantiable_type() and not self.is_output and self.get_linked() is not None:
-            self.get_linked().get_source_reference()
+        linked = None if self.is_output or self.is_instantiable_type() else self.get_linked()
+        if linked is not None:
+            linked.get_source_reference()
         else:
             reference = self.node.get_source_socket_reference(self)
             if target_type and target_type != self.data_type:
@@ -96,8 +100,9 @@ class MaltSocket(bpy.types.NodeSocket):
     
     def get_source_initialization(self):
         assert(self.active)
-        if self.get_linked():
-            return self.get_linked().get_source_reference(self.data_type)
+        linked = self.get_linked()
+        if linked:
+            return linked.get_source_reference(self.data_type)
         elif self.default_initialization != '':
             return self.default_initialization
         elif self.is_struct_member() and (self.get_struct_socket().get_linked() or self.get_struct_socket().default_initialization != ''):
@@ -106,23 +111,23 @@ class MaltSocket(bpy.types.NodeSocket):
             return self.get_source_global_reference()
 
     def get_linked(self, ignore_muted=True):
-        def get_linked_internal(socket):
-            if socket.is_linked == False and ignore_muted:
+        socket = self
+        # Follow reroute nodes until a non reroute socket is found
+        while True:
+            if ignore_muted and socket.is_linked == False:
                 return None
-            else:
-                try: link = socket.links[0]
-                except: return None #socket.links can be empty even if is_linked is true!?!?!
-                if ignore_muted and link.is_muted:
-                    return None
-                linked = link.to_socket if socket.is_output else link.from_socket
-                if isinstance(linked.node, bpy.types.NodeReroute):
-                    sockets = linked.node.inputs if linked.is_output else linked.node.outputs
-                    if len(sockets) == 0:
-                        return None
-                    return get_linked_internal(sockets[0])
-                else:
-                    return linked if linked.active else None
-        return get_linked_internal(self)
+            try: link = socket.links[0]
+            except: return None #socket.links can be empty even if is_linked is true!?!?!
+            if ignore_muted and link.is_muted:
+                return None
+            linked = link.to_socket if socket.is_output else link.from_socket
+            node = linked.node
+            if isinstance(node, bpy.types.NodeReroute) == False:
+                return linked if linked.active else None
+            sockets = node.inputs if linked.is_output else node.outputs
+            if len(sockets) == 0:
+                return None
+            socket = sockets[0]
     
     def get_ui_label(self, print_type=True):
         name = self.ui_label
@@ -151,7 +156,6 @@ class MaltSocket(bpy.types.NodeSocket):
                 layout.prop(self, 'show_in_material_panel', text='', icon=icon)
     
     def setup_shape(self):
-        from Malt.PipelineParameters import Parameter
         base_type = True
         try:
             Parameter.from_glsl_type(self.data_type)
@@ -30,16 +30,18 @@ class MaltArrayIndexNode(bpy.types.Node, MaltNode):
         self.setup_sockets(inputs, outputs)
 
     def get_source_socket_reference(self, socket):
-        return '{}_0_{}'.format(self.get_source_name(), socket.name)
+        return f'{self.get_source_name()}_0_{socket.name}'
     
     def get_source_code(self, transpiler):
         array = self.inputs['array']
         index = self.inputs['index']
         element = self.outputs['element']
-        element_reference = index.get_source_global_reference()
-        if index.get_linked():
-            element_reference = index.get_linked().get_source_reference()
-        initialization = '{}[{}]'.format(array.get_linked().get_source_reference(), element_reference)
+        index_linked = index.get_linked()
+        if index_linked:
+            element_reference = index_linked.get_source_reference()
+        else:
+            element_reference = index.get_source_global_reference()
+        initialization = f'{array.get_linked().get_source_reference()}[{element_reference}]'
         return transpiler.declaration(element.data_type, element.array_size, element.get_source_reference(), initialization)
 
     
@@ -1,3 +1,4 @@
+from copy import deepcopy
 from Malt.PipelineParameters import Type, Parameter, MaterialParameter, GraphParameter
 import bpy    
 from BlenderMalt.MaltNodes.MaltNode import MaltNode
@@ -73,10 +74,7 @@ class MaltFunctionNodeBase(MaltNode):
                         return function
             except:
                 pass
-        parameters = set()
-        from itertools import chain
-        for socket in chain(self.inputs.keys(), self.outputs.keys()):
-            parameters.add(socket)
+        parameters = {*self.inputs.keys(), *self.outputs.keys()}
         key, function = None, None
         matching_parameters = 0
         total_parameters = 0
@@ -100,15 +98,12 @@ class MaltFunctionNodeBase(MaltNode):
 
     def get_function(self, skip_overrides=True, find_replacement=False):
         graph = self.id_data.get_pipeline_graph()
-        function = None
-        if self.function_type in graph.functions:
-            function = graph.functions[self.function_type]
-        elif self.function_type in self.id_data.get_library()['functions']:
-            function = self.id_data.get_library()['functions'][self.function_type]
-        elif find_replacement:
+        function = graph.functions.get(self.function_type)
+        if function is None:
+            function = self.id_data.get_library()['functions'].get(self.function_type)
+        if function is None and find_replacement:
             function = self.find_replacement_function()
         if function:
-            from copy import deepcopy
             function = deepcopy(function)
             function['parameters'] += self.get_custom_io()
             if skip_overrides:
@@ -186,12 +181,12 @@ class MaltFunctionNodeBase(MaltNode):
         source_name = self.get_source_name()
 
         parameters = []
-        post_parameter_initialization = ''
+        post_parameter_initialization = []
         for input in self.inputs:
             if input.active and input.is_struct_member():
                 initialization = input.get_source_initialization()
                 if initialization:
-                    post_parameter_initialization += transpiler.asignment(input.get_source_reference(), initialization)
+                    post_parameter_initialization.append(transpiler.asignment(input.get_source_reference(), initialization))
 
         for parameter in function['parameters']:
             initialization = None
@@ -202,10 +197,9 @@ class MaltFunctionNodeBase(MaltNode):
         
         if self.pass_graph_type != '':
             def add_implicit_parameter(name):
-                parameter = transpiler.parameter_reference(self.get_source_name(), name, None)
-                initialization = transpiler.global_reference(self.get_source_name(), name)
-                nonlocal post_parameter_initialization
-                post_parameter_initialization += transpiler.asignment(parameter, initialization)
+                parameter = transpiler.parameter_reference(source_name, name, None)
+                initialization = transpiler.global_reference(source_name, name)
+                post_parameter_initialization.append(transpiler.asignment(parameter, initialization))
             graph = self.id_data.get_pipeline_graph(self.pass_graph_type)
             if graph.graph_type == graph.GLOBAL_GRAPH:
                 if graph.language == 'Python':
@@ -214,7 +208,7 @@ class MaltFunctionNodeBase(MaltNode):
                     add_implicit_parameter('PASS_MATERIAL')
             add_implicit_parameter('CUSTOM_IO')
 
-        return transpiler.call(function, source_name, parameters, post_parameter_initialization)
+        return transpiler.call(function, source_name, parameters, ''.join(post_parameter_initialization))
     
     def draw_buttons(self, context, layout):
         if self.pass_graph_type != '':
@@ -112,49 +112,49 @@ class MaltIONode(bpy.types.Node, MaltNode):
             return transpiler.io_parameter_reference(socket.name, io)
     
     def get_source_code(self, transpiler):
-        code = ''
+        code = []
         if self.is_output:
             function = self.get_function()
-            custom_outputs = ''
+            custom_outputs = []
             for socket in self.inputs:
                 if socket.active == False:
                     continue
                 if self.is_custom_socket(socket):
-                    custom_outputs += transpiler.asignment(self.get_source_socket_reference(socket), socket.get_source_initialization())
+                    custom_outputs.append(transpiler.asignment(self.get_source_socket_reference(socket), socket.get_source_initialization()))
                 else:
                     if socket.name == 'result':
-                        code += transpiler.declaration(socket.data_type, socket.array_size, socket.name)
+                        code.append(transpiler.declaration(socket.data_type, socket.array_size, socket.name))
                     initialization = socket.get_source_initialization()
                     if initialization:
-                        code += transpiler.asignment(socket.get_source_reference(), initialization)
-            if custom_outputs != '':
+                        code.append(transpiler.asignment(socket.get_source_reference(), initialization))
+            if len(custom_outputs) > 0:
                 graph_io = self.id_data.get_pipeline_graph().graph_io[self.io_type]
                 try: io_wrap = graph_io.io_wrap
                 except: io_wrap = ''
-                code += transpiler.preprocessor_wrap(io_wrap, custom_outputs)
+                code.append(transpiler.preprocessor_wrap(io_wrap, ''.join(custom_outputs)))
             if function['type'] != 'void':
-                code += transpiler.result(self.inputs['result'].get_source_reference())
+                code.append(transpiler.result(self.inputs['result'].get_source_reference()))
 
-        return code
+        return ''.join(code)
     
     def get_source_global_parameters(self, transpiler):
-        src = MaltNode.get_source_global_parameters(self, transpiler)
-        custom_outputs = ''
+        src = [MaltNode.get_source_global_parameters(self, transpiler)]
+        custom_outputs = []
         graph_io = self.id_data.get_pipeline_graph().graph_io[self.io_type]
         index = graph_io.custom_output_start_index
         for key, parameter in self.get_custom_parameters().items():
             if parameter.is_output:
                 socket = self.inputs[key]
-                custom_outputs += transpiler.custom_output_declaration(socket.data_type, key, index, self.io_type)
+                custom_outputs.append(transpiler.custom_output_declaration(socket.data_type, key, index, self.io_type))
                 index += 1
             else:
                 socket = self.outputs[key]
-                src += transpiler.global_declaration(parameter.parameter, 0, self.get_source_socket_reference(socket))
-        if custom_outputs != '':
+                src.append(transpiler.global_declaration(parameter.parameter, 0, self.get_source_socket_reference(socket)))
+        if len(custom_outputs) > 0:
             try: io_wrap = graph_io.io_wrap
             except: io_wrap = ''
-            src += transpiler.preprocessor_wrap(io_wrap, custom_outputs)
-        return src
+            src.append(transpiler.preprocessor_wrap(io_wrap, ''.join(custom_outputs)))
+        return ''.join(src)
     
     def draw_buttons(self, context, layout):
         return #TODO: only 1 custom pass signature for now
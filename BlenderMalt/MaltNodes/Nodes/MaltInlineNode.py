@@ -1,6 +1,13 @@
 import bpy    
 from BlenderMalt.MaltNodes.MaltNode import MaltNode
 
+_INLINE_VARS = ('a','b','c','d','e','f','g','h')
+
+# The inputs and outputs of the last setup_sockets call, keyed by node pointer
+_LAST_SETUP_KEYS = {}
+def get_last_setup_keys():
+    return _LAST_SETUP_KEYS
+
 
 class MaltInlineNode(bpy.types.Node, MaltNode):
     
@@ -20,19 +27,25 @@ class MaltInlineNode(bpy.types.Node, MaltNode):
     def malt_init(self):
         self.setup()
     
+    def free(self):
+        _LAST_SETUP_KEYS.pop(self.as_pointer(), None)
+        MaltNode.free(self)
+    
     def malt_update(self):
         last = 0
+        linked_inputs = {}
         for i, input in enumerate(self.inputs):
-            if input.data_type != '' or input.get_linked():
+            linked = input.get_linked()
+            linked_inputs[input.name] = (input, linked)
+            if input.data_type != '' or linked:
                 last = i + 1
-        variables = 'abcdefgh'[:min(last+1,8)]
+        variables = _INLINE_VARS[:min(last+1,8)]
         
         inputs = {}
         for var in variables:
             inputs[var] = {'type': ''}
-            if var in self.inputs:
-                input = self.inputs[var]
-                linked = self.inputs[var].get_linked()
+            if var in linked_inputs:
+                input, linked = linked_inputs[var]
                 if linked and linked.data_type != '':
                     inputs[var] = {'type': linked.data_type, 'size': linked.array_size}
                 else:
@@ -44,7 +57,17 @@ class MaltInlineNode(bpy.types.Node, MaltNode):
             if out:
                 outputs['result'] = {'type': out.data_type, 'size': out.array_size}
         
+        # Skip the socket setup if nothing changed since the last one.
+        # The current sockets are part of the key, since undo can restore them under a reused pointer
+        tree = self.id_data
+        current_sockets = tuple((socket.name, socket.data_type, socket.array_size)
+            for sockets in (self.inputs, self.outputs) for socket in sockets)
+        setup_key = repr((inputs, outputs, current_sockets,
+            id(tree.get_pipeline_graph()), id(tree.get_library())))
+        if _LAST_SETUP_KEYS.get(self.as_pointer()) == setup_key:
+            return
         self.setup_sockets(inputs, outputs)
+        _LAST_SETUP_KEYS[self.as_pointer()] = setup_key
 
     def draw_buttons(self, context, layout):
         layout.prop(self, 'code', text='')
@@ -57,22 +80,21 @@ class MaltInlineNode(bpy.types.Node, MaltNode):
             MaltNode.draw_socket(self, context, layout, socket, socket.name)
 
     def get_source_socket_reference(self, socket):
-        return '{}_0_{}'.format(self.get_source_name(), socket.name)
+        return f'{self.get_source_name()}_0_{socket.name}'
     
     def get_source_code(self, transpiler):
-        code = ''
         result_socket = self.outputs['result']
-        code += transpiler.declaration(result_socket.data_type, result_socket.array_size, result_socket.get_source_reference())
+        code = transpiler.declaration(result_socket.data_type, result_socket.array_size, result_socket.get_source_reference())
 
-        scoped_code = ''
+        scoped_code = []
         for input in self.inputs:
             if input.data_type != '':
                 initialization = input.get_source_initialization()
-                scoped_code += transpiler.declaration(input.data_type, input.array_size, input.name, initialization)
+                scoped_code.append(transpiler.declaration(input.data_type, input.array_size, input.name, initialization))
         if self.code != '':
-            scoped_code += transpiler.asignment(self.outputs['result'].get_source_reference(), self.code)
+            scoped_code.append(transpiler.asignment(self.outputs['result'].get_source_reference(), self.code))
 
-        return code + transpiler.scoped(scoped_code)
+        return code + transpiler.scoped(''.join(scoped_code))
 
     
 classes = [
@@ -19,10 +19,10 @@ class MaltStructNode(bpy.types.Node, MaltNode):
 
     def get_struct(self):
         graph = self.id_data.get_pipeline_graph()
-        if self.struct_type in graph.structs:
-            return graph.structs[self.struct_type]
-        else:
-            return self.id_data.get_library()['structs'][self.struct_type]
+        struct = graph.structs.get(self.struct_type)
+        if struct is None:
+            struct = self.id_data.get_library()['structs'][self.struct_type]
+        return struct
 
     def get_source_socket_reference(self, socket):
         if socket.name == self.struct_type:
@@ -34,17 +34,17 @@ class MaltStructNode(bpy.types.Node, MaltNode):
         return self.inputs[self.struct_type].get_linked() is not None
 
     def get_source_code(self, transpiler):
-        code = ''
+        code = []
         
         for input in self.inputs:
             initialization = input.get_source_initialization()
             if input.is_struct_member():
                 if initialization:
-                    code += transpiler.asignment(input.get_source_reference(), initialization)
+                    code.append(transpiler.asignment(input.get_source_reference(), initialization))
             else:
-                code += transpiler.declaration(input.data_type, 0, self.get_source_name(), initialization)
+                code.append(transpiler.declaration(input.data_type, 0, self.get_source_name(), initialization))
         
-        return code
+        return ''.join(code)
 
         
 classes = [
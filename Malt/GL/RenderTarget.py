@@ -1,7 +1,33 @@
 import ctypes
+from functools import lru_cache
 
 from Malt.GL.GL import *
 
+_CLEAR_FUNCTIONS = {
+    GL_INT : glClearBufferiv,
+    GL_UNSIGNED_INT : glClearBufferuiv,
+    GL_FLOAT : glClearBufferfv,
+    GL_HALF_FLOAT : glClearBufferfv,
+    GL_UNSIGNED_BYTE : glClearBufferfv,
+}
+
+def new_clear_buffer(data_format, color):
+    size = 1
+    try: size = len(color)
+    except: pass
+    return gl_buffer(data_format, size, color)
+
+# Bounded, since clear colors can come from (animated) user parameters
+@lru_cache(maxsize=64)
+def get_cached_clear_buffer(data_format, color):
+    return new_clear_buffer(data_format, color)
+
+def get_clear_buffer(data_format, color):
+    try:
+        return get_cached_clear_buffer(data_format, color)
+    except TypeError:
+        #Unhashable color
+        return new_clear_buffer(data_format, color)
 
 class RenderTarget():
 
@@ -55,29 +81,20 @@ class RenderTarget():
         self.bind()
         flags = 0
         for i, color in enumerate(colors):
-            function_map = {
-                GL_INT : glClearBufferiv,
-                GL_UNSIGNED_INT : glClearBufferuiv,
-                GL_FLOAT : glClearBufferfv,
-                GL_HALF_FLOAT : glClearBufferfv,
-                GL_UNSIGNED_BYTE : glClearBufferfv,
-            }
             target = self.targets[i]
             if target is None:
                 continue
             if isinstance(color, ctypes.Array) == False:
-                size = 1
-                try: size = len(color)
-                except: pass
-                color = gl_buffer(target.data_format, size, color)
-            function_map[target.data_format](GL_COLOR, i, color)
+                color = get_clear_buffer(target.data_format, color)
+            _CLEAR_FUNCTIONS[target.data_format](GL_COLOR, i, color)
         if depth:
             glClearDepth(depth)
             flags |= GL_DEPTH_BUFFER_BIT
         if stencil:
             glClearStencil(stencil)
             flags |= GL_STENCIL_BUFFER_BIT
-        glClear(flags)
+        if flags:
+            glClear(flags)
     
     def __del__(self):
         glDeleteFramebuffers(1, self.FBO)
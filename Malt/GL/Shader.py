@@ -83,6 +83,7 @@ class GLUniform():
         self.array_length = array_length
         self.set_function = uniform_type_set_function(self.type)
         self.value = None
+        self.last_value = None
         self.set_value(value)
     
     def is_sampler(self):
@@ -106,6 +107,14 @@ class GLUniform():
                 return value
     
     def set_value(self, value):
+        # Render nodes set the same uniform values every frame, skip re-creating the buffer for them.
+        # Only immutable values are compared, since lists can be modified in place.
+        if isinstance(value, (bool, int, float, tuple)):
+            if self.value is not None and self.last_value is not None and type(value) == type(self.last_value) and value == self.last_value:
+                return
+            self.last_value = value
+        else:
+            self.last_value = None
         if self.base_type == GL_UNSIGNED_INT:
             try: value = max(0, value)
             except: value = [max(0, v) for v in value]
@@ -113,6 +122,7 @@ class GLUniform():
     
     def set_buffer(self, buffer):
         self.value = buffer
+        self.last_value = None
     
     def bind(self, buffer=None):
         if buffer is None:
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from Malt.GL.GL import *
 from Malt.GL import Mesh
 
@@ -169,6 +170,8 @@ class Gradient():
         glDeleteTextures(1, self.texture)
 
 
+# Pure function of a GL enum, formats are converted every time a texture is created
+@lru_cache(maxsize=64)
 def internal_format_to_data_format(internal_format):
     name = GL_ENUMS[internal_format]
     table = {
@@ -182,6 +185,7 @@ def internal_format_to_data_format(internal_format):
             return value
     return GL_UNSIGNED_BYTE
 
+@lru_cache(maxsize=64)
 def data_format_size(data_format):
     name = GL_ENUMS[data_format]
     table = {
@@ -194,6 +198,7 @@ def data_format_size(data_format):
             return value
     return 4
 
+@lru_cache(maxsize=64)
 def internal_format_to_sampler_type(internal_format):
     table = {
         GL_UNSIGNED_BYTE : 'sampler2D',
@@ -204,6 +209,7 @@ def internal_format_to_sampler_type(internal_format):
     }
     return table[internal_format_to_data_format(internal_format)]
 
+@lru_cache(maxsize=64)
 def internal_format_to_vector_type(internal_format):
     table = {
         'sampler2D' : 'vec4',
@@ -212,6 +218,7 @@ def internal_format_to_vector_type(internal_format):
     }
     return table[internal_format_to_sampler_type(internal_format)]
 
+@lru_cache(maxsize=64)
 def internal_format_to_format(internal_format):
     name = GL_ENUMS[internal_format]
     table = {
@@ -232,6 +239,7 @@ def internal_format_to_format(internal_format):
                 return value
     raise Exception(name, ' Texture format not supported')
 
+@lru_cache(maxsize=64)
 def format_channels(format):
     table = {
         GL_RGBA : 4,
@@ -239,6 +247,6 @@ def format_channels(format):
         GL_RG : 2,
         GL_RED : 1,
     }
-    if format in table.keys():
+    if format in table:
         return table[format]
     return 1
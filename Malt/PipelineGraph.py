@@ -1,4 +1,8 @@
+import re, textwrap
 from Malt.Utils import scan_dirs, LOG
+from Malt.SourceTranspiler import GLSLTranspiler
+
+_NON_MACRO_CHARACTERS = re.compile(r'\W')
 
 
 class PipelineGraphIO():
@@ -105,7 +109,7 @@ class GLSLPipelineGraph(PipelineGraph):
         return result
     
     def name_as_macro(self, name):
-        return ''.join(c for c in name.replace(' ','_').upper() if c.isalnum() or c == '_')
+        return _NON_MACRO_CHARACTERS.sub('', name.replace(' ','_').upper())
     
     def get_material_define(self):
         return f'IS_{self.name_as_macro(self.name)}_SHADER'
@@ -142,22 +146,20 @@ class GLSLPipelineGraph(PipelineGraph):
         self.subcategories = subcategories
     
     def generate_source(self, parameters):
-        import textwrap
-        from Malt.SourceTranspiler import GLSLTranspiler
-        code = ''
+        code = []
         for graph_io in self.graph_io.values():
-            if graph_io.name in parameters.keys() and graph_io.define:
-                code += '#define {}\n'.format(graph_io.define)
-        code += '\n\n' + self.default_global_scope + '\n\n'
+            if graph_io.name in parameters and graph_io.define:
+                code.append(f'#define {graph_io.define}\n')
+        code.extend(('\n\n', self.default_global_scope, '\n\n'))
         for file in self.lib_files:
-            code += f'#include "{file}"\n'
-        code += '\n\n' + parameters['GLOBAL'] + '\n\n'
+            code.append(f'#include "{file}"\n')
+        code.extend(('\n\n', parameters['GLOBAL'], '\n\n'))
         for graph_io in self.graph_io.values():
-            if graph_io.name in parameters.keys():
-                code += GLSLTranspiler.preprocessor_wrap(graph_io.shader_type,
-                '{}\n{{\n{}\n}}'.format(graph_io.signature, textwrap.indent(parameters[graph_io.name],'\t')))
-        code += '\n\n'
-        return code
+            if graph_io.name in parameters:
+                code.append(GLSLTranspiler.preprocessor_wrap(graph_io.shader_type,
+                '{}\n{{\n{}\n}}'.format(graph_io.signature, textwrap.indent(parameters[graph_io.name],'\t'))))
+        code.append('\n\n')
+        return ''.join(code)
     
     def compile_material(self, source, include_paths=[]):
         def preprocess(params):
@@ -220,20 +222,17 @@ class PythonPipelineGraph(PipelineGraph):
             self.nodes[reflection['name']] = node_class
     
     def generate_source(self, parameters):
-        src = ''
-        for io in self.graph_io.keys():
-            if io in parameters.keys():
-                src += parameters[io]
-        return src
+        return ''.join(parameters[io] for io in self.graph_io.keys() if io in parameters)
     
     def run_source(self, pipeline, source, PARAMETERS, IN, OUT):
         try:
             def run_node(node_name, node_type, parameters):
-                if node_name not in self.node_instances.keys():
+                node_instance = self.node_instances.get(node_name)
+                if node_instance is None:
                     node_class = self.nodes[node_type]
-                    self.node_instances[node_name] = node_class(pipeline)
+                    node_instance = self.node_instances[node_name] = node_class(pipeline)
                 parameters['__GLOBALS__'] = PARAMETERS
-                self.node_instances[node_name].execute(parameters)
+                node_instance.execute(parameters)
             exec(source)
         except:
             raise MaltGraphExecutionException(source, PARAMETERS, IN, OUT)
@@ -18,6 +18,9 @@ class RenderLayers(PipelineNode):
         self.texture_targets = {}
         self.render_target = None
         self.custom_io = []
+        self.opaque_targets = {}
+        self.transparent_targets = {}
+        self.color_targets = {}
     
     @staticmethod
     def get_pass_type():
@@ -40,27 +43,42 @@ class RenderLayers(PipelineNode):
         return outputs
     
     def setup_render_targets(self, resolution, custom_io):
+        # Reuse the textures of the outputs that still exist when only the custom IO changed
+        is_same_resolution = resolution == self.resolution
+        last_opaque_targets = self.opaque_targets if is_same_resolution else {}
+        last_transparent_targets = self.transparent_targets if is_same_resolution else {}
+        last_color_targets = self.color_targets if is_same_resolution else {}
         self.opaque_targets = {}
         self.transparent_targets = {}
         self.color_targets = {}
         
         for io in custom_io:
             if io['io'] == 'out' and io['type'] == 'Texture':#TODO
-                self.opaque_targets[io['name']] = Texture(resolution, GL.GL_RGBA16F)
-                self.transparent_targets[io['name']] = Texture(resolution, GL.GL_RGBA16F)
-                self.color_targets[io['name']] = Texture(resolution, GL.GL_RGBA16F)
+                name = io['name']
+                if name in last_opaque_targets:
+                    self.opaque_targets[name] = last_opaque_targets[name]
+                    self.transparent_targets[name] = last_transparent_targets[name]
+                    self.color_targets[name] = last_color_targets[name]
+                else:
+                    self.opaque_targets[name] = Texture(resolution, GL.GL_RGBA16F)
+                    self.transparent_targets[name] = Texture(resolution, GL.GL_RGBA16F)
+                    self.color_targets[name] = Texture(resolution, GL.GL_RGBA16F)
         
         self.fbo_opaque = RenderTarget([*self.opaque_targets.values()])
         self.fbo_transparent = RenderTarget([*self.transparent_targets.values()])
         self.fbo_color = RenderTarget([*self.color_targets.values()])
+        # fbo_color and fbo_transparent have the same number of targets
+        self.clear_colors = [(0,0,0,0)]*len(self.color_targets)
+        self.blend_uniforms = [(f'IN_BACK[{i}]', f'IN_FRONT[{i}]') for i in range(len(self.color_targets))]
     
     def blend_transparency(self, back_textures, front_textures, fbo):
         global _BLEND_TRANSPARENCY_SHADER
         if _BLEND_TRANSPARENCY_SHADER is None:
             _BLEND_TRANSPARENCY_SHADER = self.pipeline.compile_shader_from_source('#include "Passes/BlendTransparency.glsl"')
-        for i in range(len(fbo.targets)):
-            _BLEND_TRANSPARENCY_SHADER.textures[f'IN_BACK[{str(i)}]'] = back_textures[i]
-            _BLEND_TRANSPARENCY_SHADER.textures[f'IN_FRONT[{str(i)}]'] = front_textures[i]
+        textures = _BLEND_TRANSPARENCY_SHADER.textures
+        for (back_name, front_name), back, front in zip(self.blend_uniforms, back_textures, front_textures):
+            textures[back_name] = back
+            textures[front_name] = front
         self.pipeline.draw_screen_pass(_BLEND_TRANSPARENCY_SHADER, fbo)
     
     def execute(self, parameters):
@@ -75,9 +93,11 @@ class RenderLayers(PipelineNode):
                 self.resolution = self.pipeline.resolution
                 self.custom_io = custom_io
 
-            self.fbo_color.clear([(0,0,0,0)]*len(self.fbo_color.targets))
-            self.fbo_transparent.clear([(0,0,0,0)]*len(self.fbo_transparent.targets))
+            self.fbo_color.clear(self.clear_colors)
+            self.fbo_transparent.clear(self.clear_colors)
             
+            # Nothing to copy or blend when the graph has no texture outputs
+            has_targets = len(self.color_targets) > 0
             self.layer_index = 0
             self.layer_count = inputs['Transparent Layers'] + 1
             graph['parameters']['__RENDER_LAYERS__'] = self
@@ -85,18 +105,17 @@ class RenderLayers(PipelineNode):
                 graph['parameters']['__LAYER_INDEX__'] = self.layer_index
                 graph['parameters']['__LAYER_COUNT__'] = self.layer_count
                 self.pipeline.graphs['Render Layer'].run_source(self.pipeline, graph['source'], graph['parameters'], inputs, outputs)
-                results = []
-                for io in self.custom_io:
-                    if io['io'] == 'out' and io['type'] == 'Texture':
-                        results.append(outputs[io['name']])
-                if i == 0:
-                    self.pipeline.copy_textures(self.fbo_opaque, results)
-                else:
-                    self.blend_transparency(results, self.fbo_transparent.targets, self.fbo_color)
-                    self.pipeline.copy_textures(self.fbo_transparent, self.fbo_color.targets)
+                if has_targets:
+                    results = [outputs[name] for name in self.color_targets]
+                    if i == 0:
+                        self.pipeline.copy_textures(self.fbo_opaque, results)
+                    else:
+                        self.blend_transparency(results, self.fbo_transparent.targets, self.fbo_color)
+                        self.pipeline.copy_textures(self.fbo_transparent, self.fbo_color.targets)
                 self.layer_index += 1     
             
-            self.blend_transparency(self.fbo_opaque.targets, self.fbo_transparent.targets, self.fbo_color)
+            if has_targets:
+                self.blend_transparency(self.fbo_opaque.targets, self.fbo_transparent.targets, self.fbo_color)
             outputs.update(self.color_targets)
 
 
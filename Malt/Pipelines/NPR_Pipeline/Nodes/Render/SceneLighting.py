@@ -91,9 +91,11 @@ class SceneLighting(PipelineNode):
             inputs['Point Resolution'],
             inputs['Sun CSM Count'])
         
-        shader_resources = scene.shader_resources.copy()
-        shader_resources['COMMON_UNIFORMS'] = self.common_buffer
-        shader_resources['SCENE_LIGHTS'] = self.lights_buffer
+        shader_resources = {
+            **scene.shader_resources,
+            'COMMON_UNIFORMS': self.common_buffer,
+            'SCENE_LIGHTS': self.lights_buffer,
+        }
 
         def render_shadowmaps(lights, fbos_opaque, fbos_transparent):
             for light_index, light_matrices_pair in enumerate(lights.items()):
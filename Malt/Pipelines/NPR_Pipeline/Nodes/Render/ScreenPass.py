@@ -30,16 +30,22 @@ class ScreenPass(PipelineNode):
         custom_io = parameters['CUSTOM_IO']
 
         if self.pipeline.resolution != self.resolution or self.custom_io != custom_io:
+            # Reuse the textures of the outputs that still exist when only the custom IO changed
+            last_targets = self.texture_targets if self.pipeline.resolution == self.resolution else {}
             self.texture_targets = {}
             for io in custom_io:
                 if io['io'] == 'out':
                     if io['type'] == 'Texture':#TODO
-                        self.texture_targets[io['name']] = Texture(self.pipeline.resolution, GL.GL_RGBA16F)
+                        texture = last_targets.get(io['name'])
+                        if texture is None:
+                            texture = Texture(self.pipeline.resolution, GL.GL_RGBA16F)
+                        self.texture_targets[io['name']] = texture
             self.render_target = RenderTarget([*self.texture_targets.values()])
+            self.clear_colors = [(0,0,0,0)]*len(self.texture_targets)
             self.resolution = self.pipeline.resolution
             self.custom_io = custom_io
         
-        self.render_target.clear([(0,0,0,0)]*len(self.texture_targets))
+        self.render_target.clear(self.clear_colors)
 
         if material and material.shader and 'SHADER' in material.shader:
             shader = material.shader['SHADER']
@@ -16,6 +16,7 @@ class MainPass(PipelineNode):
         PipelineNode.__init__(self, pipeline)
         self.resolution = None
         self.t_depth = None
+        self.custom_targets = {}
     
     @staticmethod
     def get_pass_type():
@@ -35,6 +36,8 @@ class MainPass(PipelineNode):
         return outputs
     
     def setup_render_targets(self, resolution, t_depth, custom_io):
+        # Reuse the textures that are still valid when only the depth texture or the custom IO changed
+        last_targets = self.custom_targets if resolution == self.resolution else {}
         self.custom_targets = {}
         for io in custom_io:
             if io['io'] == 'out' and io['type'] == 'Texture':#TODO
@@ -44,9 +47,13 @@ class MainPass(PipelineNode):
                     'vec3' : GL.GL_RGB16F,
                     'vec4' : GL.GL_RGBA16F,
                 }
-                self.custom_targets[io['name']] = Texture(resolution, formats[io['subtype']])
+                texture = last_targets.get(io['name'])
+                if texture is None or texture.internal_format != formats[io['subtype']]:
+                    texture = Texture(resolution, formats[io['subtype']])
+                self.custom_targets[io['name']] = texture
         self.t_depth = t_depth
         self.fbo = RenderTarget([*self.custom_targets.values()], self.t_depth)
+        self.clear_colors = [(0,0,0,0)] * len(self.fbo.targets)
 
     def execute(self, parameters):
         inputs = parameters['IN']
@@ -78,7 +85,7 @@ class MainPass(PipelineNode):
                     glsl_name = GLSLTranspiler.custom_io_reference('IN', 'MAIN_PASS_PIXEL_SHADER', io['name'])
                     shader_resources['CUSTOM_IO'+glsl_name] = TextureShaderResource(glsl_name, inputs[io['name']])
                     
-        self.fbo.clear([(0,0,0,0)] * len(self.fbo.targets))
+        self.fbo.clear(self.clear_colors)
         self.pipeline.draw_scene_pass(self.fbo, scene.batches, 'MAIN_PASS', self.pipeline.default_shader['MAIN_PASS'], 
             shader_resources, GL_EQUAL)
 
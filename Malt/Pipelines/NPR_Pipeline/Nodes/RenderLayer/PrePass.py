@@ -18,6 +18,7 @@ class PrePass(PipelineNode):
         PipelineNode.__init__(self, pipeline)
         self.resolution = None
         self.custom_io = []
+        self.custom_targets = {}
         self.npr_light_shaders = NPR_LightShaders()
     
     @staticmethod
@@ -39,23 +40,32 @@ class PrePass(PipelineNode):
         return outputs
     
     def setup_render_targets(self, resolution, custom_io):
-        self.t_depth = Texture(resolution, GL_DEPTH_COMPONENT32F)
+        # The base targets only depend on the resolution, don't re-create them when only the custom IO changed
+        is_same_resolution = resolution == self.resolution
+        if is_same_resolution == False:
+            self.t_depth = Texture(resolution, GL_DEPTH_COMPONENT32F)
+            
+            self.t_normal_depth = Texture(resolution, GL_RGBA32F)
+            self.t_id = Texture(resolution, GL_RGBA16UI, min_filter=GL_NEAREST, mag_filter=GL_NEAREST)
+
+            self.t_last_layer_id = Texture(resolution, GL_R16UI, min_filter=GL_NEAREST, mag_filter=GL_NEAREST)
+            self.fbo_last_layer_id = RenderTarget([self.t_last_layer_id])
+
+            self.t_opaque_depth = Texture(resolution, GL_DEPTH_COMPONENT32F)
+            self.fbo_opaque_depth = RenderTarget([], self.t_opaque_depth)
+            self.t_transparent_depth = Texture(resolution, GL_DEPTH_COMPONENT32F)
+            self.fbo_transparent_depth = RenderTarget([], self.t_transparent_depth)
         
-        self.t_normal_depth = Texture(resolution, GL_RGBA32F)
-        self.t_id = Texture(resolution, GL_RGBA16UI, min_filter=GL_NEAREST, mag_filter=GL_NEAREST)
+        last_targets = self.custom_targets if is_same_resolution else {}
         self.custom_targets = {}
         for io in custom_io:
             if io['io'] == 'out' and io['type'] == 'Texture':#TODO
-                self.custom_targets[io['name']] = Texture(resolution, GL.GL_RGBA16F)
+                texture = last_targets.get(io['name'])
+                if texture is None:
+                    texture = Texture(resolution, GL.GL_RGBA16F)
+                self.custom_targets[io['name']] = texture
         self.fbo = RenderTarget([self.t_normal_depth, self.t_id, *self.custom_targets.values()], self.t_depth)
-        
-        self.t_last_layer_id = Texture(resolution, GL_R16UI, min_filter=GL_NEAREST, mag_filter=GL_NEAREST)
-        self.fbo_last_layer_id = RenderTarget([self.t_last_layer_id])
-
-        self.t_opaque_depth = Texture(resolution, GL_DEPTH_COMPONENT32F)
-        self.fbo_opaque_depth = RenderTarget([], self.t_opaque_depth)
-        self.t_transparent_depth = Texture(resolution, GL_DEPTH_COMPONENT32F)
-        self.fbo_transparent_depth = RenderTarget([], self.t_transparent_depth)
+        self.clear_colors = [(0,0,0,1), (0,0,0,0)] + [(0,0,0,0)]*len(self.custom_targets)
 
     def execute(self, parameters):
         inputs = parameters['IN']
@@ -75,13 +85,13 @@ class PrePass(PipelineNode):
         opaque_batches, transparent_batches = self.pipeline.get_scene_batches(scene)
         scene.batches = opaque_batches if is_opaque_pass else transparent_batches
         
-        shader_resources = scene.shader_resources.copy()
-        shader_resources.update({
+        shader_resources = {
+            **scene.shader_resources,
             'IN_OPAQUE_DEPTH': TextureShaderResource('IN_OPAQUE_DEPTH', self.t_opaque_depth),
             'IN_TRANSPARENT_DEPTH': TextureShaderResource('IN_TRANSPARENT_DEPTH', self.t_transparent_depth),
             'IN_LAST_ID': TextureShaderResource('IN_LAST_ID', self.t_last_layer_id),
-        })
-        self.fbo.clear([(0,0,0,1), (0,0,0,0)] + [(0,0,0,0)]*len(self.custom_targets), 1)
+        }
+        self.fbo.clear(self.clear_colors, 1)
 
         self.pipeline.draw_scene_pass(self.fbo, scene.batches, 'PRE_PASS', self.pipeline.default_shader['PRE_PASS'], shader_resources)
 
@@ -96,13 +106,13 @@ class PrePass(PipelineNode):
         #CUSTOM LIGHT SHADERS
         self.npr_light_shaders.load(self.pipeline, self.t_depth, scene)
 
-        scene.shader_resources = scene.shader_resources.copy()
-        scene.shader_resources.update({
+        scene.shader_resources = {
+            **scene.shader_resources,
             'LIGHTS_CUSTOM_SHADING': self.npr_light_shaders,
             'IN_NORMAL_DEPTH': TextureShaderResource('IN_NORMAL_DEPTH', self.t_normal_depth),
             'IN_ID': TextureShaderResource('IN_ID', self.t_id),
             'T_DEPTH': TextureShaderResource('', self.t_depth), #just pass the reference
-        })
+        }
 
         outputs['Scene'] = scene
         outputs['Normal Depth'] = self.t_normal_depth
@@ -1,15 +1,37 @@
-import textwrap
+import re, string, textwrap
+
+# Replace dots and spaces with underscores and remove any other non alphanumeric ASCII character
+_SOURCE_NAME_TABLE = str.maketrans({
+    **{chr(c): None for c in range(128) if chr(c) not in string.ascii_letters + string.digits + '_'},
+    '.': '_',
+    ' ': '_',
+})
+_UNDERSCORES = re.compile('_+')
+# get_source_name results, node names are sanitized on every reference to them
+_SOURCE_NAMES = {}
+
+_PREPROCESSOR_WRAP_TEMPLATE = '#ifdef {}\n{}\n#endif //{}\n'
+
+_PYTHON_PARAMETERS_DECLARATION = textwrap.dedent('''\
+_parameters = {
+    'IN' : {},
+    'OUT' : {},
+}
+''')
 
 #TODO: Send transpiler along graph types
 class SourceTranspiler():
     
     @classmethod
     def get_source_name(self, name):
-        name = name.replace('.','_').replace(' ', '_')
-        name = '_' + ''.join(char for char in name if char.isalnum() or char == '_')
-        while '__' in name:
-            name = name.replace('__','_')
-        return name
+        source_name = _SOURCE_NAMES.get(name)
+        if source_name is None:
+            source_name = name.translate(_SOURCE_NAME_TABLE)
+            if source_name.isascii() == False:
+                source_name = ''.join(char for char in source_name if char.isalnum() or char == '_')
+            source_name = _UNDERSCORES.sub('_', '_' + source_name)
+            _SOURCE_NAMES[name] = source_name
+        return source_name
 
     @classmethod
     def asignment(self, name, asignment):
@@ -72,8 +94,9 @@ class GLSLTranspiler(SourceTranspiler):
     @classmethod
     def declaration(self, type, size, name, initialization=None):
         array = '' if size == 0 else f'[{size}]'
-        asignment = f' = {initialization}' if initialization else ''
-        return f'{type} {name}{array}{asignment};\n'
+        if initialization:
+            return ''.join((type, ' ', name, array, ' = ', initialization, ';\n'))
+        return ''.join((type, ' ', name, array, ';\n'))
 
     @classmethod    
     def global_reference(self, node_name, parameter_name):
@@ -91,11 +114,7 @@ class GLSLTranspiler(SourceTranspiler):
     def preprocessor_wrap(self, define, content):
         if define is None:
             return content
-        return textwrap.dedent('''\
-        #ifdef {}
-        {}
-        #endif //{}
-        ''').format(define, content.strip(), define)
+        return _PREPROCESSOR_WRAP_TEMPLATE.format(define, content.strip(), define)
 
     @classmethod
     def custom_output_declaration(self, type, name, index, graph_io_type):
@@ -111,23 +130,23 @@ class GLSLTranspiler(SourceTranspiler):
 
     @classmethod
     def call(self, function, name, parameters=[], post_parameter_initialization = ''):
-        src = ''
+        src = []
         for i, parameter in enumerate(function['parameters']):
             if parameter['io'] in ['out','inout']:
                 initialization = parameters[i]
                 src_reference = self.parameter_reference(name, parameter['name'], parameter['io'])
-                src += self.declaration(parameter['type'], parameter['size'], src_reference, initialization)
+                src.append(self.declaration(parameter['type'], parameter['size'], src_reference, initialization))
                 parameters[i] = src_reference
-        src += post_parameter_initialization
+        src.append(post_parameter_initialization)
 
-        initialization = f'{function["name"]}({",".join(parameters)})'
+        initialization = ''.join((function['name'], '(', ','.join(parameters), ')'))
         
         if function['type'] != 'void' and self.is_instantiable_type(function['type']):
-            src += self.declaration(function['type'], 0, self.parameter_reference(name, 'result', 'out'), initialization)
+            src.append(self.declaration(function['type'], 0, self.parameter_reference(name, 'result', 'out'), initialization))
         else:
-            src += initialization + ';\n'
+            src.append(initialization + ';\n')
         
-        return src
+        return ''.join(src)
 
     @classmethod
     def result(self, result):
@@ -135,7 +154,6 @@ class GLSLTranspiler(SourceTranspiler):
 
     @classmethod    
     def scoped(self, code):
-        import textwrap
         code = textwrap.indent(code, '\t')
         return f'{{\n{code}}}\n'
 
@@ -180,23 +198,15 @@ class PythonTranspiler(SourceTranspiler):
 
     @classmethod
     def call(self, function, name, parameters=[], post_parameter_initialization = ''):
-        import textwrap
-        src = ''
-        src += textwrap.dedent(f'''
-        {name}_parameters = {{
-            'IN' : {{}},
-            'OUT' : {{}},
-        }}
-        ''')
-        for i, parameter in enumerate(function['parameters']):
-            initialization = parameters[i]
+        src = ['\n', name, _PYTHON_PARAMETERS_DECLARATION]
+        for parameter, initialization in zip(function['parameters'], parameters):
             if initialization is None:
                 initialization = 'None'
             parameter_reference = self.parameter_reference(name, parameter['name'], parameter['io'])
-            src += f'{parameter_reference} = {initialization}\n'
-        src += post_parameter_initialization
-        src += f'run_node("{name}", "{function["name"]}", {name}_parameters)\n'
-        return src
+            src.extend((parameter_reference, ' = ', initialization, '\n'))
+        src.extend((post_parameter_initialization,
+            'run_node("', name, '", "', function['name'], '", ', name, '_parameters)\n'))
+        return ''.join(src)
 
     @classmethod
     def result(self, result):
@@ -204,6 +214,5 @@ class PythonTranspiler(SourceTranspiler):
 
     @classmethod    
     def scoped(self, code):
-        import textwrap
         code = textwrap.indent(code, '\t')
         return f'if True:\n{code}'